@@ -0,0 +1,140 @@
+"""Benchmark storage, pairing, profile and rate limit hot paths on synthetic rosters.
+
+Run with: python -m benchmarks.bench_hot_paths [--sizes 1000 10000 100000] [--compare]
+
+Each run is saved to benchmarks/results/<commit>.json. With --compare, the
+results are printed next to the most recent earlier run. Timings are taken
+with tracemalloc running, so compare them with other runs rather than reading
+them as absolute numbers.
+"""
+import argparse
+import csv
+import glob
+import json
+import logging
+import os
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+from src.config.config import Config
+from src.models.player import PlayerManager
+from src.services.profile_service import ProfileService, UserProfile
+from src.services.rate_limit_service import RateLimitService
+from src.utils.database import DatabaseHandler
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+LOOKUPS = 10_000
+
+def measure(func: Callable[[], None]) -> Dict[str, float]:
+    """Run func once, returning wall time and peak traced memory"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': elapsed, 'peak_kib': peak / 1024}
+
+def write_roster(path: str, size: int) -> List[str]:
+    """Write a players.csv where everyone forms one angel/mortal cycle"""
+    usernames = [f"player{i}" for i in range(size)]
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Player', 'Angel', 'Mortal'])
+        for i, username in enumerate(usernames):
+            writer.writerow([username, usernames[i - 1], usernames[(i + 1) % size]])
+    return usernames
+
+def run_size(size: int, data_dir: str) -> Dict[str, Dict[str, float]]:
+    Config.DATA_DIR = data_dir
+    Config.PLAYER_DATA_FILE = os.path.join(data_dir, 'players.csv')
+    Config.CHAT_ID_JSON = os.path.join(data_dir, 'chat_ids.json')
+    for name in ('chat_ids.json', 'user_profiles.json'):
+        if os.path.exists(os.path.join(data_dir, name)):
+            os.remove(os.path.join(data_dir, name))
+
+    usernames = write_roster(Config.PLAYER_DATA_FILE, size)
+    with open(Config.CHAT_ID_JSON, 'w') as f:
+        json.dump({username: 100_000 + i for i, username in enumerate(usernames)}, f)
+
+    results = {}
+    player_manager = PlayerManager()
+    db_handler = DatabaseHandler(player_manager)
+    results['load_players'] = measure(db_handler.load_players)
+    results['load_chat_ids'] = measure(db_handler.load_chat_ids)
+    results['save_chat_ids'] = measure(db_handler.save_chat_ids)
+    results['validate_pairings'] = measure(player_manager.validate_pairings)
+
+    profile_service = ProfileService()
+    profile_service.profiles = {
+        username: UserProfile(username=username, nickname=username.upper(), bio="bio", interests=["a", "b"])
+        for username in usernames
+    }
+    results['save_profiles'] = measure(profile_service.save_profiles)
+
+    def profile_views():
+        for i in range(LOOKUPS):
+            player = player_manager.get_player(usernames[i % size])
+            profile_service.get_full_profile_view(player.username, player.angel.username, player.mortal.username)
+    results['get_full_profile_view'] = measure(profile_views)
+
+    rate_limit_service = RateLimitService()
+
+    def rate_limit_checks():
+        for i in range(LOOKUPS):
+            rate_limit_service.can_send_message(usernames[i % size])
+    results['can_send_message'] = measure(rate_limit_checks)
+
+    return results
+
+def get_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return 'unknown'
+
+def load_previous(commit: str) -> Optional[dict]:
+    runs = []
+    for path in glob.glob(os.path.join(RESULTS_DIR, '*.json')):
+        with open(path, 'r') as f:
+            run = json.load(f)
+        if run['commit'] != commit:
+            runs.append(run)
+    return max(runs, key=lambda run: run['timestamp']) if runs else None
+
+def report(run: dict, previous: Optional[dict]) -> None:
+    for size, results in run['results'].items():
+        print(f"\n{size} players")
+        for name, result in results.items():
+            line = f"  {name:<24} {result['seconds'] * 1000:>10.2f} ms {result['peak_kib']:>12.1f} KiB"
+            old = previous['results'].get(size, {}).get(name) if previous else None
+            if old and old['seconds']:
+                line += f"   ({result['seconds'] / old['seconds']:.2f}x vs {previous['commit']})"
+            print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--compare', action='store_true', help='compare with the previous stored run')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    commit = get_commit()
+    run = {'commit': commit, 'timestamp': time.time(), 'results': {}}
+    with tempfile.TemporaryDirectory() as data_dir:
+        for size in args.sizes:
+            run['results'][str(size)] = run_size(size, data_dir)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(os.path.join(RESULTS_DIR, f'{commit}.json'), 'w') as f:
+        json.dump(run, f, indent=4)
+
+    report(run, load_previous(commit) if args.compare else None)
+
+if __name__ == '__main__':
+    main()
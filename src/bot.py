@@ -1,14 +1,19 @@
 import logging
 import datetime
+from telegram import Update
 from telegram.ext import Application, CommandHandler as TelegramCommandHandler
 from telegram.ext import MessageHandler as TelegramMessageHandler
-from telegram.ext import CallbackQueryHandler, ConversationHandler, filters
+from telegram.ext import CallbackQueryHandler, ConversationHandler, PersistenceInput, PicklePersistence, TypeHandler, filters
 
 from src.config.config import Config
 from src.models.player import PlayerManager
 from src.utils.database import DatabaseHandler
+from src.utils.update_processor import PerUserUpdateProcessor
+from src.utils.transport import build_requests
 from src.services.player_service import PlayerService
+from src.services.lifecycle_service import LifecycleService
 from src.handlers.command_handler import CommandHandler, SETTING_NICKNAME, SETTING_BIO, SETTING_INTERESTS
+from src.handlers.command_handler import SCHEDULE_CHOOSING, SCHEDULE_TIME, SCHEDULE_MESSAGE
 
 # Set up logging
 Config.setup_directories()
@@ -26,7 +31,15 @@ def main():
     player_manager = PlayerManager()
     db_handler = DatabaseHandler(player_manager)
     player_service = PlayerService(player_manager, db_handler)
-    command_handler = CommandHandler(player_service)
+    send_request, updates_request = build_requests()
+    command_handler = CommandHandler(player_service, [send_request, updates_request])
+    lifecycle_service = LifecycleService(
+        command_handler.message_service,
+        command_handler.schedule_service,
+        command_handler.stats_service,
+        command_handler.profile_service,
+        db_handler
+    )
     
     # Initialize data
     if not player_service.initialize_data():
@@ -34,11 +47,29 @@ def main():
         return
     
     # Initialize bot
-    application = Application.builder().token(Config.BOT_TOKEN).build()
+    application = (
+        Application.builder()
+        .token(Config.BOT_TOKEN)
+        # Only conversation state is needed, which keeps each write small
+        .persistence(PicklePersistence(
+            filepath=Config.PERSISTENCE_FILE,
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=False, callback_data=False)
+        ))
+        .request(send_request)
+        .get_updates_request(updates_request)
+        .concurrent_updates(PerUserUpdateProcessor(Config.MAX_CONCURRENT_UPDATES))
+        .post_init(lifecycle_service.start)
+        .post_stop(lifecycle_service.stop)
+        .build()
+    )
+    
+    # Drop messages that were already relayed before any other handler sees them
+    application.add_handler(TypeHandler(Update, command_handler.skip_redelivered), group=-1)
     
     # Add basic command handlers
     application.add_handler(TelegramCommandHandler("start", command_handler.start))
     application.add_handler(TelegramCommandHandler("profile", command_handler.profile_command))
+    application.add_handler(TelegramCommandHandler("stats", command_handler.stats_command))
     
     # Add conversation handler for sending messages
     send_handler = ConversationHandler(
@@ -53,9 +84,17 @@ def main():
             ],
             Config.MORTAL: [
                 TelegramMessageHandler(filters.ALL & ~filters.COMMAND, command_handler.send_mortal)
+            ],
+            ConversationHandler.TIMEOUT: [
+                TypeHandler(Update, lifecycle_service.save_after_timeout)
             ]
         },
-        fallbacks=[TelegramCommandHandler("cancel", command_handler.cancel)]
+        fallbacks=[TelegramCommandHandler("cancel", command_handler.cancel)],
+        conversation_timeout=Config.SEND_CONVERSATION_TIMEOUT,
+        # Persisted so a message redelivered after a restart still reaches the relay handlers;
+        # each state change is written as soon as the update is handled (see record_update)
+        name="send",
+        persistent=True
     )
     
     # Add conversation handler for profile setup
@@ -75,9 +114,30 @@ def main():
         fallbacks=[TelegramCommandHandler("cancel", command_handler.cancel)]
     )
     
+    # Add conversation handler for scheduled messages
+    schedule_handler = ConversationHandler(
+        entry_points=[TelegramCommandHandler("schedule", command_handler.schedule_command)],
+        states={
+            SCHEDULE_CHOOSING: [
+                CallbackQueryHandler(command_handler.schedule_choose, pattern="^schedule_(angel|mortal)$")
+            ],
+            SCHEDULE_TIME: [
+                TelegramMessageHandler(filters.TEXT & ~filters.COMMAND, command_handler.handle_schedule_time)
+            ],
+            SCHEDULE_MESSAGE: [
+                TelegramMessageHandler(filters.TEXT & ~filters.COMMAND, command_handler.handle_schedule_message)
+            ]
+        },
+        fallbacks=[TelegramCommandHandler("cancel", command_handler.cancel)]
+    )
+    
     # Add all handlers
     application.add_handler(send_handler)
     application.add_handler(setup_handler)
+    application.add_handler(schedule_handler)
+    
+    # Record each update and save conversation state once every other handler group has processed it
+    application.add_handler(TypeHandler(Update, lifecycle_service.record_update), group=1)
     
     # Start the bot
     logger.info("Starting bot...")
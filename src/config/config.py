@@ -16,6 +16,51 @@ class Config:
     # Data files
     PLAYER_DATA_FILE = os.path.join(DATA_DIR, 'players.csv')
     CHAT_ID_JSON = os.path.join(DATA_DIR, 'chat_ids.json')
+    FILTER_WORDS_FILE = os.path.join(DATA_DIR, 'filter_words.txt')
+    PERSISTENCE_FILE = os.path.join(DATA_DIR, 'bot_state.pickle')
+    
+    # Content filter: "block", "mask" or "flag"
+    FILTER_ACTION = os.getenv("FILTER_ACTION", "mask")
+    FILTER_PHONE_NUMBERS = os.getenv("FILTER_PHONE_NUMBERS", "true").lower() == "true"
+    
+    # Scheduled messages
+    TIMEZONE = os.getenv("BOT_TIMEZONE", "UTC")
+    MAX_SCHEDULED_PER_PLAYER = 20
+    SCHEDULE_MAX_ATTEMPTS = 3
+    SCHEDULE_RETRY_SECONDS = 60
+    SCHEDULE_COMPACT_THRESHOLD = 1000
+    
+    # Organizer chat IDs allowed to use admin commands
+    ADMIN_CHAT_IDS = {
+        int(chat_id) for chat_id in os.getenv("ADMIN_CHAT_IDS", "").split(",") if chat_id.strip()
+    }
+    
+    # Engagement stats
+    STATS_SNAPSHOT_INTERVAL = 300  # in seconds
+    STATS_INACTIVE_DAYS = 3
+    STATS_MAX_LISTED = 20
+    
+    # HTTP transport: connection pools for outbound calls and getUpdates
+    # (defaults match python-telegram-bot's own)
+    SEND_POOL_SIZE = int(os.getenv("SEND_POOL_SIZE", "256"))
+    UPDATES_POOL_SIZE = int(os.getenv("UPDATES_POOL_SIZE", "1"))
+    KEEPALIVE_CONNECTIONS = int(os.getenv("KEEPALIVE_CONNECTIONS", str(SEND_POOL_SIZE)))
+    KEEPALIVE_EXPIRY = 30.0  # in seconds
+    POOL_TIMEOUT = float(os.getenv("POOL_TIMEOUT", "1.0"))  # in seconds
+    HTTP_VERSION = os.getenv("HTTP_VERSION", "1.1")  # "2" requires python-telegram-bot[http2]
+    
+    # Per-call read/write timeouts in seconds
+    TEXT_SEND_TIMEOUT = 10.0
+    MEDIA_SEND_TIMEOUT = 30.0
+    
+    # Updates handled at once; each chat's updates are still handled in order
+    MAX_CONCURRENT_UPDATES = int(os.getenv("MAX_CONCURRENT_UPDATES", "32"))
+    
+    # Number of recently relayed messages remembered to skip redelivered updates
+    DEDUP_WINDOW_SIZE = 4096
+    
+    # Seconds to wait for in-flight sends on shutdown
+    SHUTDOWN_DRAIN_TIMEOUT = 10
     
     # Message icons/aliases
     ANGEL_ICON = "😇"
@@ -24,6 +69,9 @@ class Config:
     # Conversation states
     CHOOSING, ANGEL, MORTAL = range(3)
     
+    # Seconds before an unfinished /send is abandoned
+    SEND_CONVERSATION_TIMEOUT = 600
+    
     @staticmethod
     def setup_directories():
         """Create necessary directories if they don't exist"""
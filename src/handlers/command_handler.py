@@ -1,56 +1,98 @@
 import logging
+import datetime
+from typing import Optional, Sequence
+from zoneinfo import ZoneInfo
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardRemove
-from telegram.ext import ContextTypes, ConversationHandler
+from telegram.ext import ApplicationHandlerStop, ContextTypes, ConversationHandler
 from src.config.config import Config
+from src.models.player import Player
+from src.utils.transport import MetricsHTTPXRequest
 from src.services.player_service import PlayerService
 from src.services.message_service import MessageService
 from src.services.rate_limit_service import RateLimitService
 from src.services.profile_service import ProfileService
+from src.services.content_filter_service import ContentFilterService
+from src.services.schedule_service import ScheduleService
+from src.services.stats_service import StatsService
+from src.services.dedup_service import DedupService
 
 logger = logging.getLogger(__name__)
 
 # States for profile setup flow
 SETTING_NICKNAME, SETTING_BIO, SETTING_INTERESTS = range(3, 6)
 
+# States for scheduled message flow
+SCHEDULE_CHOOSING, SCHEDULE_TIME, SCHEDULE_MESSAGE = range(6, 9)
+
 class CommandHandler:
-    def __init__(self, player_service: PlayerService):
+    def __init__(self, player_service: PlayerService, transport_requests: Sequence[MetricsHTTPXRequest] = ()):
         self.player_service = player_service
+        self.transport_requests = transport_requests
         self.message_service = MessageService()
         self.rate_limit_service = RateLimitService()
         self.profile_service = ProfileService()
+        self.content_filter_service = ContentFilterService(player_service.player_manager)
+        self.stats_service = StatsService(player_service.player_manager)
+        self.schedule_service = ScheduleService(
+            player_service.player_manager,
+            self.message_service,
+            self.rate_limit_service,
+            self.stats_service
+        )
+        self.dedup_service = DedupService()
+    
+    def _get_player(self, update: Update) -> Optional[Player]:
+        """Resolve the player behind an update by their chat ID"""
+        return self.player_service.get_player_by_chat_id(update.effective_chat.id)
+    
+    async def skip_redelivered(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Stop handling a message that has already been relayed (e.g. redelivered after a crash)"""
+        message = update.effective_message
+        if message and self.dedup_service.is_duplicate(update.effective_chat.id, message.message_id):
+            logger.info(f"Skipping redelivered message {message.message_id} from chat {update.effective_chat.id}.")
+            raise ApplicationHandlerStop
     
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle the /start command"""
-        username = update.message.chat.username.lower()
+        player = self._get_player(update)
         
-        if not self.player_service.is_registered(username):
-            await update.message.reply_text("Sorry, you are not registered for this private event.")
-            return
-        
-        player = self.player_service.register_player(username, update.message.chat.id)
+        # Username is only used to bind a chat ID the first time
+        if not player:
+            username = update.message.chat.username
+            if not username:
+                await update.message.reply_text(
+                    "Please set a Telegram username in your settings, then send /start again."
+                )
+                return
+            
+            if not self.player_service.is_registered(username):
+                await update.message.reply_text("Sorry, you are not registered for this private event.")
+                return
+            
+            player = self.player_service.register_player(username, update.message.chat.id)
         await update.message.reply_text(
             f"Welcome, {player.username}! 🎭\n\n"
             f"Available commands:\n"
             f"/send - Send a message to your angel or mortal\n"
+            f"/schedule - Schedule a message for later\n"
             f"/setup - Set up your profile (nickname, bio, interests)\n"
             f"/profile - View your profile"
         )
     
     async def profile_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle the /profile command"""
-        username = update.message.chat.username.lower()
-        if not self.player_service.is_registered(username):
+        player = self._get_player(update)
+        if not player:
             await update.message.reply_text("Sorry, you are not registered for this private event.")
             return
             
-        relationships = self.player_service.get_player_relationships(username)
-        if not relationships:
+        angel, mortal = player.angel, player.mortal
+        if not angel or not mortal:
             await update.message.reply_text("Error: Could not find your relationships.")
             return
             
-        angel, mortal = relationships
         profile_summary = self.profile_service.get_full_profile_view(
-            username,
+            player.username,
             angel.username,
             mortal.username
         )
@@ -58,8 +100,7 @@ class CommandHandler:
     
     async def setup_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Start the profile setup process"""
-        username = update.message.chat.username.lower()
-        if not self.player_service.is_registered(username):
+        if not self._get_player(update):
             await update.message.reply_text("Sorry, you are not registered for this private event.")
             return ConversationHandler.END
         
@@ -71,7 +112,10 @@ class CommandHandler:
 
     async def handle_nickname(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Handle nickname input and ask for bio"""
-        username = update.message.chat.username.lower()
+        player = self._get_player(update)
+        if not player:
+            await update.message.reply_text("Sorry, you are not registered for this private event.")
+            return ConversationHandler.END
         nickname = update.message.text.strip()
         
         if len(nickname) > 32:
@@ -81,7 +125,7 @@ class CommandHandler:
             )
             return SETTING_NICKNAME
         
-        self.profile_service.set_nickname(username, nickname)
+        self.profile_service.set_nickname(player.username, nickname)
         await update.message.reply_text(
             f"Great! Your nickname is set to: {nickname}\n\n"
             "Now, tell me a bit about yourself (your bio):"
@@ -90,7 +134,10 @@ class CommandHandler:
 
     async def handle_bio(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Handle bio input and ask for interests"""
-        username = update.message.chat.username.lower()
+        player = self._get_player(update)
+        if not player:
+            await update.message.reply_text("Sorry, you are not registered for this private event.")
+            return ConversationHandler.END
         bio = update.message.text.strip()
         
         if len(bio) > 300:
@@ -100,7 +147,7 @@ class CommandHandler:
             )
             return SETTING_BIO
         
-        self.profile_service.set_bio(username, bio)
+        self.profile_service.set_bio(player.username, bio)
         await update.message.reply_text(
             "Perfect! Your bio is saved.\n\n"
             "Finally, what are your interests? (Enter multiple interests separated by commas)"
@@ -109,7 +156,10 @@ class CommandHandler:
 
     async def handle_interests(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Handle interests input and complete setup"""
-        username = update.message.chat.username.lower()
+        player = self._get_player(update)
+        if not player:
+            await update.message.reply_text("Sorry, you are not registered for this private event.")
+            return ConversationHandler.END
         interests_text = update.message.text.strip()
         
         # Split interests by commas and clean them up
@@ -121,10 +171,10 @@ class CommandHandler:
         
         # Add each interest
         for interest in interests:
-            self.profile_service.add_interest(username, interest)
+            self.profile_service.add_interest(player.username, interest)
         
         # Show the complete profile
-        profile_summary = self.profile_service.get_profile_summary(username)
+        profile_summary = self.profile_service.get_profile_summary(player.username)
         await update.message.reply_text(
             "🎉 Your profile is complete!\n\n" + profile_summary
         )
@@ -132,14 +182,14 @@ class CommandHandler:
     
     async def send_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Handle the /send command"""
-        username = update.message.chat.username.lower()
+        player = self._get_player(update)
         
-        if not self.player_service.is_registered(username):
+        if not player:
             await update.message.reply_text("Sorry, you are not registered for this private event.")
             return ConversationHandler.END
         
-        if not self.rate_limit_service.can_send_message(username):
-            remaining_time = self.rate_limit_service.get_remaining_time(username)
+        if not self.rate_limit_service.can_send_message(player.username):
+            remaining_time = self.rate_limit_service.get_remaining_time(player.username)
             await update.message.reply_text(
                 f"You're sending messages too quickly! Please wait {int(remaining_time)} seconds."
             )
@@ -156,14 +206,13 @@ class CommandHandler:
     
     async def start_angel(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Start conversation with angel"""
-        username = update.callback_query.message.chat.username.lower()
-        relationships = self.player_service.get_player_relationships(username)
+        player = self._get_player(update)
         
-        if not relationships:
+        if not player or not player.angel:
             await update.callback_query.message.reply_text("Error: Could not find your relationships.")
             return ConversationHandler.END
             
-        angel, _ = relationships
+        angel = player.angel
         if not angel.is_registered:
             await update.callback_query.message.reply_text("Your angel has not started the bot yet.")
             return ConversationHandler.END
@@ -173,14 +222,13 @@ class CommandHandler:
     
     async def start_mortal(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Start conversation with mortal"""
-        username = update.callback_query.message.chat.username.lower()
-        relationships = self.player_service.get_player_relationships(username)
+        player = self._get_player(update)
         
-        if not relationships:
+        if not player or not player.mortal:
             await update.callback_query.message.reply_text("Error: Could not find your relationships.")
             return ConversationHandler.END
             
-        _, mortal = relationships
+        mortal = player.mortal
         if not mortal.is_registered:
             await update.callback_query.message.reply_text("Your mortal has not started the bot yet.")
             return ConversationHandler.END
@@ -190,14 +238,21 @@ class CommandHandler:
     
     async def send_angel(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Send message to angel"""
-        username = update.message.chat.username.lower()
-        relationships = self.player_service.get_player_relationships(username)
+        player = self._get_player(update)
         
-        if not relationships:
+        if not player or not player.angel:
             await update.message.reply_text("Error: Could not find your relationships.")
             return ConversationHandler.END
             
-        angel, _ = relationships
+        angel = player.angel
+        filtered = self.content_filter_service.filter_message(
+            update.message.text or update.message.caption,
+            player.username
+        )
+        if filtered.blocked:
+            await update.message.reply_text("Your message contains blocked content and was not sent.")
+            return ConversationHandler.END
+        
         success = False
         is_media = not bool(update.message.text)
         
@@ -205,19 +260,22 @@ class CommandHandler:
             success = await self.message_service.send_text(
                 context.bot,
                 angel,
-                update.message.text,
+                filtered.text,
                 is_from_angel=False
             )
         else:
             success = await self.message_service.send_media(
                 update,
                 context.bot,
-                angel
+                angel,
+                caption=filtered.text
             )
         
         if success:
+            self.dedup_service.record(update.effective_chat.id, update.message.message_id)
+            self.stats_service.record_message(player, angel, to_angel=True, is_media=is_media)
             await update.message.reply_text("Your message has been sent to your Angel.")
-            logger.info(f"{username} sent a message to their angel ({angel.username}).")
+            logger.info(f"{player.username} sent a message to their angel ({angel.username}).")
         else:
             await update.message.reply_text("Failed to send message to your Angel.")
         
@@ -225,14 +283,21 @@ class CommandHandler:
     
     async def send_mortal(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Send message to mortal"""
-        username = update.message.chat.username.lower()
-        relationships = self.player_service.get_player_relationships(username)
+        player = self._get_player(update)
         
-        if not relationships:
+        if not player or not player.mortal:
             await update.message.reply_text("Error: Could not find your relationships.")
             return ConversationHandler.END
             
-        _, mortal = relationships
+        mortal = player.mortal
+        filtered = self.content_filter_service.filter_message(
+            update.message.text or update.message.caption,
+            player.username
+        )
+        if filtered.blocked:
+            await update.message.reply_text("Your message contains blocked content and was not sent.")
+            return ConversationHandler.END
+        
         success = False
         is_media = not bool(update.message.text)
         
@@ -240,24 +305,131 @@ class CommandHandler:
             success = await self.message_service.send_text(
                 context.bot,
                 mortal,
-                update.message.text,
+                filtered.text,
                 is_from_angel=True
             )
         else:
             success = await self.message_service.send_media(
                 update,
                 context.bot,
-                mortal
+                mortal,
+                caption=filtered.text
             )
         
         if success:
+            self.dedup_service.record(update.effective_chat.id, update.message.message_id)
+            self.stats_service.record_message(player, mortal, to_angel=False, is_media=is_media)
             await update.message.reply_text("Your message has been sent to your Mortal.")
-            logger.info(f"{username} sent a message to their mortal ({mortal.username}).")
+            logger.info(f"{player.username} sent a message to their mortal ({mortal.username}).")
         else:
             await update.message.reply_text("Failed to send message to your Mortal.")
         
         return ConversationHandler.END
     
+    async def schedule_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        """Handle the /schedule command"""
+        player = self._get_player(update)
+        
+        if not player:
+            await update.message.reply_text("Sorry, you are not registered for this private event.")
+            return ConversationHandler.END
+        
+        if self.schedule_service.count_pending(player.username) >= Config.MAX_SCHEDULED_PER_PLAYER:
+            await update.message.reply_text(
+                f"You already have {Config.MAX_SCHEDULED_PER_PLAYER} scheduled messages waiting to be delivered."
+            )
+            return ConversationHandler.END
+        
+        schedule_menu = [
+            [InlineKeyboardButton("Angel", callback_data='schedule_angel')],
+            [InlineKeyboardButton("Mortal", callback_data='schedule_mortal')]
+        ]
+        reply_markup = InlineKeyboardMarkup(schedule_menu)
+        await update.message.reply_text("Schedule a message to your:", reply_markup=reply_markup)
+        
+        return SCHEDULE_CHOOSING
+    
+    async def schedule_choose(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        """Store the scheduled message recipient and ask for the delivery time"""
+        player = self._get_player(update)
+        target = update.callback_query.data.removeprefix('schedule_')
+        
+        if not player or not getattr(player, target):
+            await update.callback_query.message.reply_text("Error: Could not find your relationships.")
+            return ConversationHandler.END
+        
+        context.user_data['schedule_target'] = target
+        await update.callback_query.message.reply_text(
+            f"When should it be delivered? Use the format YYYY-MM-DD HH:MM ({Config.TIMEZONE})."
+        )
+        return SCHEDULE_TIME
+    
+    async def handle_schedule_time(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        """Handle delivery time input and ask for the message"""
+        try:
+            due = datetime.datetime.strptime(update.message.text.strip(), "%Y-%m-%d %H:%M")
+        except ValueError:
+            await update.message.reply_text(
+                "Invalid time! Please use the format YYYY-MM-DD HH:MM.\n"
+                "Enter the delivery time:"
+            )
+            return SCHEDULE_TIME
+        
+        due = due.replace(tzinfo=ZoneInfo(Config.TIMEZONE))
+        if due <= datetime.datetime.now(datetime.timezone.utc):
+            await update.message.reply_text(
+                "That time has already passed!\n"
+                "Enter the delivery time:"
+            )
+            return SCHEDULE_TIME
+        
+        context.user_data['schedule_due'] = due.timestamp()
+        await update.message.reply_text("Please type the message you want to schedule.")
+        return SCHEDULE_MESSAGE
+    
+    async def handle_schedule_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        """Store the scheduled message"""
+        player = self._get_player(update)
+        if not player:
+            await update.message.reply_text("Sorry, you are not registered for this private event.")
+            return ConversationHandler.END
+        
+        filtered = self.content_filter_service.filter_message(update.message.text, player.username)
+        if filtered.blocked:
+            await update.message.reply_text("Your message contains blocked content and was not scheduled.")
+            return ConversationHandler.END
+        
+        target = context.user_data.pop('schedule_target')
+        due = context.user_data.pop('schedule_due')
+        self.schedule_service.schedule(player.username, target, filtered.text, due)
+        
+        await update.message.reply_text(
+            f"Your message to your {target.capitalize()} has been scheduled for "
+            f"{datetime.datetime.fromtimestamp(due, ZoneInfo(Config.TIMEZONE)).strftime('%Y-%m-%d %H:%M')}."
+        )
+        logger.info(f"{player.username} scheduled a message to their {target}.")
+        return ConversationHandler.END
+    
+    async def stats_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle the /stats command (organizers only); /stats csv exports per-player counts"""
+        if update.effective_chat.id not in Config.ADMIN_CHAT_IDS:
+            await update.message.reply_text("Sorry, this command is only available to organizers.")
+            return
+        
+        if context.args and context.args[0].lower() == 'csv':
+            await update.message.reply_document(
+                document=self.stats_service.export_csv(),
+                filename='stats.csv'
+            )
+            return
+        
+        summary = self.stats_service.get_summary()
+        if self.transport_requests:
+            summary += "\n\n🌐 Connection pools\n" + "\n".join(
+                request.get_summary() for request in self.transport_requests
+            )
+        await update.message.reply_text(summary)
+    
     async def cancel(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Cancel the conversation"""
         await update.message.reply_text(
@@ -16,6 +16,7 @@ class Player:
 class PlayerManager:
     def __init__(self):
         self.players: Dict[str, Player] = {}
+        self.players_by_chat_id: Dict[int, Player] = {}
     
     def add_player(self, username: str) -> Player:
         """Add a new player or get existing one"""
@@ -28,6 +29,23 @@ class PlayerManager:
         """Get a player by username"""
         return self.players.get(username.lower())
     
+    def get_player_by_chat_id(self, chat_id: int) -> Optional[Player]:
+        """Get a player by their Telegram chat ID"""
+        return self.players_by_chat_id.get(chat_id)
+    
+    def set_chat_id(self, player: Player, chat_id: int) -> None:
+        """Bind a chat ID to a player, keeping the chat ID index in sync"""
+        if player.chat_id is not None and self.players_by_chat_id.get(player.chat_id) is player:
+            del self.players_by_chat_id[player.chat_id]
+        
+        # A chat can only belong to one player
+        previous = self.players_by_chat_id.get(chat_id)
+        if previous is not None and previous is not player:
+            previous.chat_id = None
+        
+        player.chat_id = chat_id
+        self.players_by_chat_id[chat_id] = player
+    
     def set_angel_mortal(self, player_username: str, angel_username: str, mortal_username: str) -> None:
         """Set up angel and mortal relationships"""
         player = self.get_player(player_username)
@@ -46,4 +64,4 @@ class PlayerManager:
             if (player.angel.mortal.username != player.username or 
                 player.mortal.angel.username != player.username):
                 return False
-        return True 
\ No newline at end of file
+        return True
@@ -0,0 +1,167 @@
+import logging
+import os
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from src.config.config import Config
+from src.models.player import PlayerManager
+
+logger = logging.getLogger(__name__)
+
+# Filter actions
+BLOCK = "block"
+MASK = "mask"
+FLAG = "flag"
+
+# Either an international number with a leading "+" (separators allowed) or an
+# unbroken run of 8-15 digits that is not a YYYYMMDD date, so spaced-out dates and
+# scores such as "2024 12 25" or "100 200 300" are left alone
+PHONE_NUMBER_PATTERN = re.compile(
+    r'(?<![\w+])(?:'
+    r'\+\d(?:[\s-]?\d){7,14}'
+    r'|(?!(?:19|20)\d{2}(?:0[1-9]|1[0-2])(?:0[1-9]|[12]\d|3[01])(?!\d))\d{8,15}'
+    r')(?!\w)'
+)
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+class AhoCorasick:
+    """Multi-pattern matcher that scans text in time linear in its length"""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # Lengths of the patterns ending at each node, including via fail links
+        self.output: List[List[int]] = [[]]
+        self.pattern_count = 0
+
+        for pattern in patterns:
+            self._add_pattern(pattern)
+        self._build_fail_links()
+
+    def _add_pattern(self, pattern: str) -> None:
+        if not pattern:
+            return
+
+        node = 0
+        for char in pattern:
+            next_node = self.goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.goto)
+                self.goto[node][char] = next_node
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            node = next_node
+
+        if len(pattern) not in self.output[node]:
+            self.output[node].append(len(pattern))
+            self.pattern_count += 1
+
+    def _build_fail_links(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child].extend(self.output[self.fail[child]])
+
+    def find_all(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Yield (start, end) spans of every pattern occurrence in text"""
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            for length in self.output[node]:
+                yield i + 1 - length, i + 1
+
+@dataclass
+class FilterResult:
+    text: Optional[str]
+    matches: List[str] = field(default_factory=list)
+    blocked: bool = False
+
+class ContentFilterService:
+    def __init__(self, player_manager: PlayerManager, action: str = Config.FILTER_ACTION):
+        if action not in (BLOCK, MASK, FLAG):
+            raise ValueError(f"Unknown filter action: {action}")
+
+        self.player_manager = player_manager
+        self.action = action
+        self.words_file = Config.FILTER_WORDS_FILE
+        self._automaton: Optional[AhoCorasick] = None
+
+    def load_words(self) -> List[str]:
+        """Load the organizer word list, one entry per line"""
+        if not os.path.exists(self.words_file):
+            return []
+
+        with open(self.words_file, 'r') as f:
+            return [
+                line.strip().lower()
+                for line in f
+                if line.strip() and not line.startswith('#')
+            ]
+
+    def rebuild(self) -> None:
+        """Rebuild the automaton from the word list and the current roster"""
+        patterns = set(self.load_words())
+        for username in self.player_manager.players:
+            patterns.add(username)
+            patterns.add(f"@{username}")
+
+        self._automaton = AhoCorasick(patterns)
+        logger.info(f"Content filter built with {self._automaton.pattern_count} patterns.")
+
+    def _find_spans(self, text: str) -> List[Tuple[int, int]]:
+        if self._automaton is None:
+            self.rebuild()
+
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Keep offsets aligned for characters whose lowercase form is longer
+            lowered = ''.join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+        spans = []
+        for start, end in self._automaton.find_all(lowered):
+            # Only match whole words so that short patterns don't hit inside longer ones
+            if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+                continue
+            if end < len(text) and _is_word_char(text[end]) and _is_word_char(text[end - 1]):
+                continue
+            spans.append((start, end))
+
+        if Config.FILTER_PHONE_NUMBERS:
+            spans.extend(match.span() for match in PHONE_NUMBER_PATTERN.finditer(text))
+
+        return spans
+
+    def filter_message(self, text: Optional[str], username: str) -> FilterResult:
+        """Apply the configured filter action to an outgoing message"""
+        if not text:
+            return FilterResult(text=text)
+
+        spans = self._find_spans(text)
+        if not spans:
+            return FilterResult(text=text)
+
+        matches = sorted({text[start:end] for start, end in spans})
+        logger.warning(f"Filtered content from {username} ({self.action}): {matches}")
+
+        if self.action == BLOCK:
+            return FilterResult(text=text, matches=matches, blocked=True)
+        if self.action == FLAG:
+            return FilterResult(text=text, matches=matches)
+
+        masked = list(text)
+        for start, end in spans:
+            for i in range(start, end):
+                masked[i] = '*'
+        return FilterResult(text=''.join(masked), matches=matches)
@@ -0,0 +1,96 @@
+import logging
+import os
+from typing import List, Optional, Set, Tuple
+from src.config.config import Config
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[int, int]  # (chat_id, message_id)
+
+class DedupService:
+    """Remembers the most recently relayed messages so redelivered updates are not relayed twice.
+
+    Keys live in a fixed-size ring buffer with a set for O(1) lookups.
+    Recorded keys are appended to a journal that is replayed on startup and
+    compacted once it grows past twice the window size.
+    """
+
+    def __init__(self, window_size: int = Config.DEDUP_WINDOW_SIZE):
+        self.dedup_file = os.path.join(Config.DATA_DIR, 'relayed_messages.log')
+        self.window_size = window_size
+        self.ring: List[Optional[Key]] = [None] * window_size
+        self.position = 0
+        self.keys: Set[Key] = set()
+        self._journal_entries = 0
+        self.load_window()
+
+    def _add(self, key: Key) -> None:
+        evicted = self.ring[self.position]
+        if evicted is not None:
+            self.keys.discard(evicted)
+
+        self.ring[self.position] = key
+        self.position = (self.position + 1) % self.window_size
+        self.keys.add(key)
+
+    def load_window(self) -> None:
+        """Replay the journal into the window"""
+        entries = 0
+        load_failed = False
+        try:
+            if os.path.exists(self.dedup_file):
+                with open(self.dedup_file, 'r') as f:
+                    lines = f.readlines()
+                entries = len(lines)
+                first_line = max(entries - self.window_size, 0) + 1
+                for line_number, line in enumerate(lines[-self.window_size:], start=first_line):
+                    try:
+                        # Every entry is written with its newline, so a line without one was cut short
+                        if not line.endswith('\n'):
+                            raise ValueError("incomplete line")
+                        chat_id, message_id = line.split()
+                        self._add((int(chat_id), int(message_id)))
+                    except Exception as e:
+                        # Skip a torn or corrupt line but keep replaying the rest
+                        logger.error(f"Skipping bad relayed message entry on line {line_number}: {e}")
+                        load_failed = True
+        except Exception as e:
+            logger.error(f"Error loading relayed messages: {e}")
+            load_failed = True
+
+        if load_failed:
+            # Leave the journal untouched so nothing is lost before it can be inspected
+            self._journal_entries = entries
+        else:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the journal with only the keys still in the window"""
+        tmp_file = f"{self.dedup_file}.tmp"
+        ordered = self.ring[self.position:] + self.ring[:self.position]
+        with open(tmp_file, 'w') as f:
+            for key in ordered:
+                if key is not None:
+                    f.write(f"{key[0]} {key[1]}\n")
+        os.replace(tmp_file, self.dedup_file)
+        self._journal_entries = len(self.keys)
+
+    def is_duplicate(self, chat_id: int, message_id: int) -> bool:
+        """Check whether a message has already been relayed"""
+        return (chat_id, message_id) in self.keys
+
+    def record(self, chat_id: int, message_id: int) -> None:
+        """Remember a relayed message"""
+        key = (chat_id, message_id)
+        if key in self.keys:
+            return
+
+        self._add(key)
+        try:
+            with open(self.dedup_file, 'a') as f:
+                f.write(f"{chat_id} {message_id}\n")
+            self._journal_entries += 1
+            if self._journal_entries > 2 * self.window_size:
+                self._compact()
+        except Exception as e:
+            logger.error(f"Error recording relayed message: {e}")
@@ -0,0 +1,135 @@
+import datetime
+import json
+import logging
+import os
+from typing import List, Optional
+from telegram import Update
+from telegram.ext import Application, ContextTypes
+from src.config.config import Config
+from src.services.message_service import MessageService
+from src.services.profile_service import ProfileService
+from src.services.schedule_service import ScheduleService
+from src.services.stats_service import StatsService
+from src.utils.database import DatabaseHandler
+
+logger = logging.getLogger(__name__)
+
+class LifecycleService:
+    """Coordinates background tasks on startup and drains/flushes them on shutdown"""
+
+    def __init__(self, message_service: MessageService, schedule_service: ScheduleService,
+                 stats_service: StatsService, profile_service: ProfileService,
+                 db_handler: DatabaseHandler):
+        self.message_service = message_service
+        self.schedule_service = schedule_service
+        self.stats_service = stats_service
+        self.profile_service = profile_service
+        self.db_handler = db_handler
+        self.state_file = os.path.join(Config.DATA_DIR, 'shutdown_state.json')
+        # Highest update ID handled so far. Updates run concurrently, so lower IDs may
+        # still have been in flight; this is for diagnostics, not a safe resume offset.
+        self.highest_update_id: Optional[int] = None
+
+    def _write_state(self, clean: bool, unflushed: List[str]) -> None:
+        state = {
+            'clean': clean,
+            'highest_update_id': self.highest_update_id,
+            'unflushed': unflushed,
+            'updated_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
+        }
+        with open(self.state_file, 'w') as f:
+            json.dump(state, f, indent=4)
+
+    def check_previous_shutdown(self) -> List[str]:
+        """Report anything the previous run did not flush, then mark this run as in progress"""
+        problems = []
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, 'r') as f:
+                    state = json.load(f)
+                self.highest_update_id = state.get('highest_update_id')
+                if not state.get('clean'):
+                    problems.append(
+                        f"Previous run did not shut down cleanly (highest update {self.highest_update_id})"
+                    )
+                problems.extend(f"Not flushed on last shutdown: {item}" for item in state.get('unflushed', []))
+        except Exception as e:
+            problems.append(f"Could not read shutdown state: {e}")
+
+        for problem in problems:
+            logger.warning(problem)
+
+        self._write_state(clean=False, unflushed=[])
+        return problems
+
+    async def record_update(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Remember the highest update ID that has been fully handled and save conversation state.
+
+        Persistence is otherwise only written periodically, so a crash could restore a
+        conversation to a state it had already left. Only changed conversations are
+        written, so this is a no-op for updates that did not change one.
+        """
+        if self.highest_update_id is None or update.update_id > self.highest_update_id:
+            self.highest_update_id = update.update_id
+        await context.application.update_persistence()
+
+    async def save_after_timeout(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Save conversation state once a timed-out conversation has ended"""
+        # The conversation only moves to END after this callback returns
+        context.application.create_task(context.application.update_persistence())
+
+    async def start(self, application: Application) -> None:
+        """Start background tasks (used as the application's post_init hook)"""
+        self.check_previous_shutdown()
+        # The roster is loaded by now, so never-active pairs can be added to the stats ordering
+        self.stats_service.seed_pairs()
+        await self.schedule_service.start(application)
+        await self.stats_service.start(application)
+
+    async def stop(self, application: Application) -> None:
+        """Drain sends and flush persistence (used as the application's post_stop hook).
+
+        By the time this runs the updater has stopped polling and the
+        application has finished handling queued updates.
+        """
+        unflushed = []
+
+        # Every step is guarded so a failure in one never skips the flushes or the state file
+        try:
+            if not await self.schedule_service.stop(application):
+                unflushed.append("scheduled message delivery")
+        except Exception as e:
+            logger.error(f"Error stopping scheduled message delivery: {e}")
+            unflushed.append("scheduled message delivery")
+
+        try:
+            in_flight = await self.message_service.drain(Config.SHUTDOWN_DRAIN_TIMEOUT)
+            if in_flight:
+                unflushed.append(f"{in_flight} in-flight sends")
+        except Exception as e:
+            logger.error(f"Error draining sends: {e}")
+            unflushed.append("in-flight sends")
+
+        try:
+            await self.stats_service.stop(application)
+        except Exception as e:
+            logger.error(f"Error stopping stats snapshots: {e}")
+
+        for name, flush in [
+            ("profiles", self.profile_service.flush),
+            ("chat IDs", self.db_handler.flush),
+            ("stats", self.stats_service.flush)
+        ]:
+            try:
+                flushed = flush()
+            except Exception as e:
+                logger.error(f"Error flushing {name}: {e}")
+                flushed = False
+            if not flushed:
+                unflushed.append(name)
+
+        for item in unflushed:
+            logger.error(f"Not flushed on shutdown: {item}")
+
+        self._write_state(clean=not unflushed, unflushed=unflushed)
+        logger.info(f"Shutdown complete (highest update {self.highest_update_id}).")
@@ -1,4 +1,7 @@
+import asyncio
 import logging
+from contextlib import contextmanager
+from typing import Optional
 from telegram import Update, Bot
 from src.config.config import Config
 from src.models.player import Player
@@ -6,74 +9,118 @@ from src.models.player import Player
 logger = logging.getLogger(__name__)
 
 class MessageService:
-    @staticmethod
-    async def send_text(bot: Bot, recipient: Player, message: str, is_from_angel: bool = True) -> bool:
+    def __init__(self):
+        self._in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+    
+    @contextmanager
+    def _track_send(self):
+        """Count a send as in flight until it completes"""
+        self._in_flight += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._idle.set()
+    
+    async def drain(self, timeout: float) -> int:
+        """Wait for in-flight sends to finish; returns how many are still pending"""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._in_flight
+    
+    async def send_text(self, bot: Bot, recipient: Player, message: str, is_from_angel: bool = True) -> bool:
         """Send a text message to a recipient"""
         if not recipient.is_registered:
             return False
             
         icon = Config.ANGEL_ICON if is_from_angel else Config.MORTAL_ICON
-        try:
-            await bot.send_message(
-                chat_id=recipient.chat_id,
-                text=f"{icon}: {message}"
-            )
-            return True
-        except Exception as e:
-            logger.error(f"Error sending message: {e}")
-            return False
+        with self._track_send():
+            try:
+                await bot.send_message(
+                    chat_id=recipient.chat_id,
+                    text=f"{icon}: {message}",
+                    read_timeout=Config.TEXT_SEND_TIMEOUT,
+                    write_timeout=Config.TEXT_SEND_TIMEOUT
+                )
+                return True
+            except Exception as e:
+                logger.error(f"Error sending message: {e}")
+                return False
     
-    @staticmethod
-    async def send_media(update: Update, bot: Bot, recipient: Player) -> bool:
-        """Send a media message to a recipient"""
+    async def send_media(self, update: Update, bot: Bot, recipient: Player, caption: Optional[str] = None) -> bool:
+        """Send a media message to a recipient, optionally overriding its caption"""
         if not recipient.is_registered:
             return False
             
         message = update.message
-        try:
-            if message.photo:
-                await bot.send_photo(
-                    chat_id=recipient.chat_id,
-                    photo=message.photo[-1].file_id,
-                    caption=message.caption
-                )
-            elif message.video:
-                await bot.send_video(
-                    chat_id=recipient.chat_id,
-                    video=message.video.file_id,
-                    caption=message.caption
-                )
-            elif message.voice:
-                await bot.send_voice(
-                    chat_id=recipient.chat_id,
-                    voice=message.voice.file_id
-                )
-            elif message.video_note:
-                await bot.send_video_note(
-                    chat_id=recipient.chat_id,
-                    video_note=message.video_note.file_id
-                )
-            elif message.sticker:
-                await bot.send_sticker(
-                    chat_id=recipient.chat_id,
-                    sticker=message.sticker.file_id
-                )
-            elif message.animation:
-                await bot.send_animation(
-                    chat_id=recipient.chat_id,
-                    animation=message.animation.file_id
-                )
-            elif message.audio:
-                await bot.send_audio(
-                    chat_id=recipient.chat_id,
-                    audio=message.audio.file_id
-                )
-            elif message.document:
-                await bot.send_document(
-                    chat_id=recipient.chat_id,
-                    document=message.document.file_id
-                )
-            return True
-        except Exception as e:
-            logger.error(f"Error sending media: {e}")
-            return False 
\ No newline at end of file
+        caption = caption if caption is not None else message.caption
+        with self._track_send():
+            try:
+                if message.photo:
+                    await bot.send_photo(
+                        chat_id=recipient.chat_id,
+                        photo=message.photo[-1].file_id,
+                        caption=caption,
+                        read_timeout=Config.MEDIA_SEND_TIMEOUT,
+                        write_timeout=Config.MEDIA_SEND_TIMEOUT
+                    )
+                elif message.video:
+                    await bot.send_video(
+                        chat_id=recipient.chat_id,
+                        video=message.video.file_id,
+                        caption=caption,
+                        read_timeout=Config.MEDIA_SEND_TIMEOUT,
+                        write_timeout=Config.MEDIA_SEND_TIMEOUT
+                    )
+                elif message.voice:
+                    await bot.send_voice(
+                        chat_id=recipient.chat_id,
+                        voice=message.voice.file_id,
+                        read_timeout=Config.MEDIA_SEND_TIMEOUT,
+                        write_timeout=Config.MEDIA_SEND_TIMEOUT
+                    )
+                elif message.video_note:
+                    await bot.send_video_note(
+                        chat_id=recipient.chat_id,
+                        video_note=message.video_note.file_id,
+                        read_timeout=Config.MEDIA_SEND_TIMEOUT,
+                        write_timeout=Config.MEDIA_SEND_TIMEOUT
+                    )
+                elif message.sticker:
+                    await bot.send_sticker(
+                        chat_id=recipient.chat_id,
+                        sticker=message.sticker.file_id,
+                        read_timeout=Config.MEDIA_SEND_TIMEOUT,
+                        write_timeout=Config.MEDIA_SEND_TIMEOUT
+                    )
+                elif message.animation:
+                    await bot.send_animation(
+                        chat_id=recipient.chat_id,
+                        animation=message.animation.file_id,
+                        read_timeout=Config.MEDIA_SEND_TIMEOUT,
+                        write_timeout=Config.MEDIA_SEND_TIMEOUT
+                    )
+                elif message.audio:
+                    await bot.send_audio(
+                        chat_id=recipient.chat_id,
+                        audio=message.audio.file_id,
+                        read_timeout=Config.MEDIA_SEND_TIMEOUT,
+                        write_timeout=Config.MEDIA_SEND_TIMEOUT
+                    )
+                elif message.document:
+                    await bot.send_document(
+                        chat_id=recipient.chat_id,
+                        document=message.document.file_id,
+                        read_timeout=Config.MEDIA_SEND_TIMEOUT,
+                        write_timeout=Config.MEDIA_SEND_TIMEOUT
+                    )
+                return True
+            except Exception as e:
+                logger.error(f"Error sending media: {e}")
+                return False 
\ No newline at end of file
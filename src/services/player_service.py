@@ -26,10 +26,14 @@ class PlayerService:
         if not player:
             return None
             
-        player.chat_id = chat_id
+        self.player_manager.set_chat_id(player, chat_id)
         self.db_handler.save_chat_ids()
         return player
     
+    def get_player_by_chat_id(self, chat_id: int) -> Optional[Player]:
+        """Get the player bound to a chat ID"""
+        return self.player_manager.get_player_by_chat_id(chat_id)
+    
     def get_player_relationships(self, username: str) -> Optional[Tuple[Player, Player]]:
         """Get a player's angel and mortal"""
         player = self.player_manager.get_player(username)
@@ -19,6 +19,7 @@ class ProfileService:
     def __init__(self):
         self.profiles_file = os.path.join(Config.DATA_DIR, 'user_profiles.json')
         self.profiles: Dict[str, UserProfile] = {}
+        self._dirty = False
         self.load_profiles()
     
     def load_profiles(self):
@@ -36,16 +37,27 @@ class ProfileService:
     
     def save_profiles(self):
         """Save profiles to file"""
+        self._dirty = True
         try:
-            with open(self.profiles_file, 'w') as f:
+            # Write to a temporary file first so readers never see a partial file
+            tmp_file = f"{self.profiles_file}.tmp"
+            with open(tmp_file, 'w') as f:
                 json.dump(
                     {username: asdict(profile) for username, profile in self.profiles.items()},
                     f,
                     indent=4
                 )
+            os.replace(tmp_file, self.profiles_file)
+            self._dirty = False
         except Exception as e:
             print(f"Error saving profiles: {e}")
     
+    def flush(self) -> bool:
+        """Retry saving profiles if the last save failed"""
+        if self._dirty:
+            self.save_profiles()
+        return not self._dirty
+    
     def get_or_create_profile(self, username: str) -> UserProfile:
         """Get existing profile or create new one"""
         if username not in self.profiles:
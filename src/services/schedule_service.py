@@ -0,0 +1,238 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
+from telegram import Bot
+from telegram.ext import Application
+from src.config.config import Config
+from src.models.player import PlayerManager
+from src.services.message_service import MessageService
+from src.services.rate_limit_service import RateLimitService
+from src.services.stats_service import StatsService
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ScheduledMessage:
+    id: str
+    sender: str
+    target: str  # "angel" or "mortal"
+    text: str
+    due: float  # unix timestamp
+    attempts: int = 0
+
+class ScheduleService:
+    """Delivers messages at a later time from a single heap-driven timer task.
+
+    Pending messages are kept in an append-only journal so that scheduling and
+    delivery cost one line each; the journal is compacted on load and whenever
+    completed entries start to dominate it.
+    """
+
+    def __init__(self, player_manager: PlayerManager, message_service: MessageService,
+                 rate_limit_service: RateLimitService, stats_service: StatsService):
+        self.player_manager = player_manager
+        self.message_service = message_service
+        self.rate_limit_service = rate_limit_service
+        self.stats_service = stats_service
+        self.schedule_file = os.path.join(Config.DATA_DIR, 'scheduled_messages.jsonl')
+        self.pending: Dict[str, ScheduledMessage] = {}
+        # Undelivered messages per sender, kept in step with pending
+        self.pending_counts: Counter = Counter()
+        self.heap: List[Tuple[float, int, str]] = []
+        # Breaks ties between messages due at the same time in scheduling order
+        self._sequence = itertools.count()
+        self._journal_entries = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.load_schedule()
+
+    def load_schedule(self) -> None:
+        """Replay the journal to rebuild pending messages"""
+        pending: Dict[str, ScheduledMessage] = {}
+        entries = 0
+        load_failed = False
+        try:
+            if os.path.exists(self.schedule_file):
+                with open(self.schedule_file, 'r') as f:
+                    for line_number, line in enumerate(f, start=1):
+                        if not line.strip():
+                            continue
+                        entries += 1
+                        try:
+                            entry = json.loads(line)
+                            op = entry.pop('op')
+                            if op == 'add':
+                                pending[entry['id']] = ScheduledMessage(**entry)
+                            elif op == 'done':
+                                pending.pop(entry['id'], None)
+                        except Exception as e:
+                            # Skip a torn or corrupt line but keep replaying the rest
+                            logger.error(f"Skipping bad scheduled message entry on line {line_number}: {e}")
+                            load_failed = True
+        except Exception as e:
+            logger.error(f"Error loading scheduled messages: {e}")
+            load_failed = True
+
+        self.pending = pending
+        self.pending_counts = Counter(message.sender for message in pending.values())
+        self.heap = [
+            (message.due, next(self._sequence), message.id)
+            for message in pending.values()
+        ]
+        heapq.heapify(self.heap)
+        if load_failed:
+            # Leave the journal untouched so nothing is lost before it can be inspected
+            self._journal_entries = entries
+        else:
+            self._compact()
+        logger.info(f"Loaded {len(self.pending)} scheduled messages.")
+
+    def _append(self, op: str, data: dict) -> None:
+        with open(self.schedule_file, 'a') as f:
+            f.write(json.dumps({'op': op, **data}) + '\n')
+        self._journal_entries += 1
+
+    def _compact(self) -> None:
+        """Rewrite the journal with only the pending messages"""
+        tmp_file = f"{self.schedule_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            for message in self.pending.values():
+                f.write(json.dumps({'op': 'add', **asdict(message)}) + '\n')
+        os.replace(tmp_file, self.schedule_file)
+        self._journal_entries = len(self.pending)
+
+    def _push(self, message: ScheduledMessage) -> None:
+        heapq.heappush(self.heap, (message.due, next(self._sequence), message.id))
+        # Only wake the timer if this message is now the next one due
+        if self._wakeup and self.heap[0][2] == message.id:
+            self._wakeup.set()
+
+    def count_pending(self, sender: str) -> int:
+        """Count a player's undelivered scheduled messages"""
+        return self.pending_counts[sender]
+
+    def schedule(self, sender: str, target: str, text: str, due: float) -> ScheduledMessage:
+        """Store a message for delivery at the given time"""
+        message = ScheduledMessage(
+            id=uuid.uuid4().hex,
+            sender=sender,
+            target=target,
+            text=text,
+            due=due
+        )
+        self._append('add', asdict(message))
+        self.pending[message.id] = message
+        self.pending_counts[sender] += 1
+        self._push(message)
+        return message
+
+    def _complete(self, message: ScheduledMessage) -> None:
+        if self.pending.pop(message.id, None) is not None:
+            self.pending_counts[message.sender] -= 1
+            if not self.pending_counts[message.sender]:
+                del self.pending_counts[message.sender]
+        self._append('done', {'id': message.id})
+        if self._journal_entries > 2 * len(self.pending) + Config.SCHEDULE_COMPACT_THRESHOLD:
+            self._compact()
+
+    def _retry(self, message: ScheduledMessage, delay: float) -> None:
+        due = time.time() + delay
+        # Only move the message once the new due time is in the journal
+        self._append('add', {**asdict(message), 'due': due})
+        message.due = due
+        self._push(message)
+
+    async def start(self, application: Application) -> None:
+        """Start the timer task (used as the application's post_init hook)"""
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(application.bot))
+
+    async def stop(self, application: Application) -> bool:
+        """Stop the timer task, letting an in-progress release finish before the deadline.
+
+        Pending messages stay in the journal. Returns False if the task had to be
+        cancelled or had died with an error.
+        """
+        if not self._task:
+            return True
+
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, Config.SHUTDOWN_DRAIN_TIMEOUT)
+            return True
+        except asyncio.TimeoutError:
+            logger.error("Scheduled message delivery did not stop in time.")
+            return False
+        except Exception as e:
+            logger.error(f"Scheduled message delivery stopped with an error: {e}")
+            return False
+        finally:
+            self._task = None
+
+    async def _run(self, bot: Bot) -> None:
+        while not self._stopping:
+            self._wakeup.clear()
+
+            while self.heap and self.heap[0][0] <= time.time() and not self._stopping:
+                due, _, message_id = heapq.heappop(self.heap)
+                message = self.pending.get(message_id)
+                # Skip heap entries superseded by a retry
+                if message is None or message.due != due:
+                    continue
+                try:
+                    await self._release(bot, message)
+                except Exception as e:
+                    # Keep the timer alive and try again later if the message is still pending
+                    logger.error(f"Error releasing scheduled message {message.id}: {e}")
+                    if message.id in self.pending:
+                        message.due = time.time() + Config.SCHEDULE_RETRY_SECONDS
+                        self._push(message)
+
+            timeout = self.heap[0][0] - time.time() if self.heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _release(self, bot: Bot, message: ScheduledMessage) -> None:
+        """Send a due message through the normal rate-limited path"""
+        sender = self.player_manager.get_player(message.sender)
+        recipient = getattr(sender, message.target, None) if sender else None
+        if recipient is None:
+            logger.error(f"Dropping scheduled message {message.id}: no {message.target} for {message.sender}")
+            self._complete(message)
+            return
+
+        if not self.rate_limit_service.can_send_message(message.sender):
+            self._retry(message, self.rate_limit_service.get_remaining_time(message.sender))
+            return
+
+        success = await self.message_service.send_text(
+            bot,
+            recipient,
+            message.text,
+            is_from_angel=message.target == 'mortal'
+        )
+        if success:
+            logger.info(f"Delivered scheduled message from {message.sender} to their {message.target}.")
+            self.stats_service.record_message(sender, recipient, to_angel=message.target == 'angel', is_media=False)
+            self._complete(message)
+            return
+
+        message.attempts += 1
+        if message.attempts >= Config.SCHEDULE_MAX_ATTEMPTS:
+            logger.error(f"Giving up on scheduled message {message.id} after {message.attempts} attempts.")
+            self._complete(message)
+        else:
+            self._retry(message, Config.SCHEDULE_RETRY_SECONDS)
@@ -0,0 +1,183 @@
+import asyncio
+import csv
+import datetime
+import io
+import json
+import logging
+import os
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from telegram.ext import Application
+from src.config.config import Config
+from src.models.player import Player, PlayerManager
+
+logger = logging.getLogger(__name__)
+
+# Indexes into the per-player counter list
+TO_ANGEL_TEXT, TO_ANGEL_MEDIA, TO_MORTAL_TEXT, TO_MORTAL_MEDIA = range(4)
+
+class StatsService:
+    """Engagement counters updated on every relay and snapshotted to disk"""
+
+    def __init__(self, player_manager: PlayerManager):
+        self.player_manager = player_manager
+        self.stats_file = os.path.join(Config.DATA_DIR, 'stats.json')
+        self.player_counts: Dict[str, List[int]] = defaultdict(lambda: [0, 0, 0, 0])
+        self.daily_counts: Dict[str, int] = defaultdict(int)
+        # (angel, mortal) -> last message time, least recently active first
+        self.pair_activity: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self.totals = [0, 0, 0, 0]
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+        self.load_stats()
+
+    def load_stats(self) -> None:
+        """Load the last snapshot"""
+        try:
+            if os.path.exists(self.stats_file):
+                with open(self.stats_file, 'r') as f:
+                    data = json.load(f)
+                    self.player_counts.update(data['player_counts'])
+                    self.daily_counts.update(data['daily_counts'])
+                    for angel, mortal, last_active in sorted(data['pair_activity'], key=lambda p: p[2]):
+                        self.pair_activity[(angel, mortal)] = last_active
+                    self.totals = data['totals']
+        except Exception as e:
+            logger.error(f"Error loading stats: {e}")
+
+    def seed_pairs(self) -> None:
+        """Add every roster pair that has never messaged as least recently active.
+
+        Call once the roster is loaded, so inactive pairs can be read from the
+        front of the activity ordering without scanning all players.
+        """
+        for player in self.player_manager.players.values():
+            if not player.mortal:
+                continue
+            pair = (player.username, player.mortal.username)
+            if pair not in self.pair_activity:
+                self.pair_activity[pair] = 0
+                self.pair_activity.move_to_end(pair, last=False)
+
+    def save_stats(self) -> None:
+        """Snapshot counters to file"""
+        data = {
+            'player_counts': self.player_counts,
+            'daily_counts': self.daily_counts,
+            'pair_activity': [[angel, mortal, t] for (angel, mortal), t in self.pair_activity.items()],
+            'totals': self.totals
+        }
+        tmp_file = f"{self.stats_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, self.stats_file)
+        self._dirty = False
+
+    def record_message(self, sender: Player, recipient: Player, to_angel: bool, is_media: bool) -> None:
+        """Update counters for a relayed message"""
+        if to_angel:
+            index = TO_ANGEL_MEDIA if is_media else TO_ANGEL_TEXT
+            pair = (recipient.username, sender.username)
+        else:
+            index = TO_MORTAL_MEDIA if is_media else TO_MORTAL_TEXT
+            pair = (sender.username, recipient.username)
+
+        self.player_counts[sender.username][index] += 1
+        today = datetime.datetime.now(ZoneInfo(Config.TIMEZONE)).strftime('%Y-%m-%d')
+        self.daily_counts[today] += 1
+        self.totals[index] += 1
+
+        self.pair_activity[pair] = time.time()
+        self.pair_activity.move_to_end(pair)
+        self._dirty = True
+
+    def get_inactive_pairs(self, days: int) -> List[Tuple[str, str]]:
+        """List (angel, mortal) pairs with no messages in the last given days"""
+        cutoff = time.time() - days * 86400
+        inactive = []
+        for pair, last_active in self.pair_activity.items():
+            if last_active >= cutoff:
+                break
+            inactive.append(pair)
+        return inactive
+
+    def get_summary(self) -> str:
+        """Get a formatted engagement summary for organizers"""
+        total_players = len(self.player_manager.players)
+        unregistered = total_players - len(self.player_manager.players_by_chat_id)
+        today = datetime.datetime.now(ZoneInfo(Config.TIMEZONE)).strftime('%Y-%m-%d')
+        text = self.totals[TO_ANGEL_TEXT] + self.totals[TO_MORTAL_TEXT]
+        media = self.totals[TO_ANGEL_MEDIA] + self.totals[TO_MORTAL_MEDIA]
+        inactive = self.get_inactive_pairs(Config.STATS_INACTIVE_DAYS)
+
+        summary = (
+            f"📊 Engagement stats\n\n"
+            f"Messages: {text + media} ({text} text, {media} media)\n"
+            f"To angels: {self.totals[TO_ANGEL_TEXT] + self.totals[TO_ANGEL_MEDIA]}, "
+            f"to mortals: {self.totals[TO_MORTAL_TEXT] + self.totals[TO_MORTAL_MEDIA]}\n"
+            f"Today: {self.daily_counts.get(today, 0)}\n"
+            f"Active senders: {len(self.player_counts)}/{total_players}\n"
+            f"Unregistered players: {unregistered}\n"
+            f"Pairs inactive for {Config.STATS_INACTIVE_DAYS}+ days: {len(inactive)}"
+        )
+        if inactive:
+            shown = inactive[:Config.STATS_MAX_LISTED]
+            summary += "\n" + "\n".join(f"😇 {angel} → 🙇 {mortal}" for angel, mortal in shown)
+            if len(inactive) > len(shown):
+                summary += f"\n...and {len(inactive) - len(shown)} more"
+        return summary
+
+    def export_csv(self) -> bytes:
+        """Export per-player counters as CSV"""
+        last_sent: Dict[str, float] = {}
+        for (angel, mortal), last_active in self.pair_activity.items():
+            last_sent[angel] = max(last_sent.get(angel, 0), last_active)
+            last_sent[mortal] = max(last_sent.get(mortal, 0), last_active)
+
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow([
+            'Player', 'Registered', 'ToAngelText', 'ToAngelMedia',
+            'ToMortalText', 'ToMortalMedia', 'LastPairActivity'
+        ])
+        for player in self.player_manager.players.values():
+            counts = self.player_counts.get(player.username, [0, 0, 0, 0])
+            last_active = last_sent.get(player.username)
+            writer.writerow([
+                player.username,
+                player.is_registered,
+                *counts,
+                datetime.datetime.fromtimestamp(last_active, ZoneInfo(Config.TIMEZONE)).isoformat()
+                if last_active else ''
+            ])
+        return output.getvalue().encode()
+
+    async def start(self, application: Application) -> None:
+        """Start periodic snapshots"""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, application: Application) -> None:
+        """Stop periodic snapshots"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def flush(self) -> bool:
+        """Write a snapshot if counters changed since the last one"""
+        if self._dirty:
+            try:
+                self.save_stats()
+            except Exception as e:
+                logger.error(f"Error saving stats: {e}")
+        return not self._dirty
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(Config.STATS_SNAPSHOT_INTERVAL)
+            self.flush()
@@ -10,6 +10,7 @@ logger = logging.getLogger(__name__)
 class DatabaseHandler:
     def __init__(self, player_manager: PlayerManager):
         self.player_manager = player_manager
+        self._dirty = False
         
     def load_players(self) -> None:
         """Load players from CSV file"""
@@ -50,7 +51,7 @@ class DatabaseHandler:
                 for username, chat_id in chat_ids.items():
                     player = self.player_manager.get_player(username)
                     if player:
-                        player.chat_id = chat_id
+                        self.player_manager.set_chat_id(player, chat_id)
                 logger.info(f"Chat IDs loaded: {chat_ids}")
         except FileNotFoundError:
             logger.warning('Chat ID JSON file not found, creating new file.')
@@ -58,6 +59,7 @@ class DatabaseHandler:
     
     def save_chat_ids(self) -> None:
         """Save chat IDs to JSON file"""
+        self._dirty = True
         chat_ids = {
             player.username: player.chat_id
             for player in self.player_manager.players.values()
@@ -66,4 +68,14 @@ class DatabaseHandler:
         
         with open(Config.CHAT_ID_JSON, 'w') as f:
             json.dump(chat_ids, f, indent=4)
-        logger.info("Chat IDs saved successfully.") 
\ No newline at end of file
+        self._dirty = False
+        logger.info("Chat IDs saved successfully.") 
+    
+    def flush(self) -> bool:
+        """Retry saving chat IDs if the last save failed"""
+        if self._dirty:
+            try:
+                self.save_chat_ids()
+            except Exception as e:
+                logger.error(f"Error saving chat IDs: {e}")
+        return not self._dirty
@@ -0,0 +1,61 @@
+from typing import Any, Tuple
+import httpx
+from telegram.error import TimedOut
+from telegram.request import HTTPXRequest
+from src.config.config import Config
+
+class MetricsHTTPXRequest(HTTPXRequest):
+    """HTTPXRequest that tracks how much of its connection pool is in use"""
+
+    def __init__(self, name: str, connection_pool_size: int, **kwargs: Any):
+        super().__init__(connection_pool_size=connection_pool_size, **kwargs)
+        self.name = name
+        self.pool_size = connection_pool_size
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.pool_timeouts = 0
+
+    async def do_request(self, *args: Any, **kwargs: Any) -> Tuple[int, bytes]:
+        self.in_flight += 1
+        self.requests += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            return await super().do_request(*args, **kwargs)
+        except TimedOut as e:
+            if isinstance(e.__cause__, httpx.PoolTimeout):
+                self.pool_timeouts += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    def get_summary(self) -> str:
+        """Get a one-line summary of pool usage"""
+        return (
+            f"{self.name}: {self.in_flight}/{self.pool_size} in use, peak {self.peak_in_flight}, "
+            f"{self.requests} requests, {self.pool_timeouts} pool timeouts"
+        )
+
+def build_requests() -> Tuple[MetricsHTTPXRequest, MetricsHTTPXRequest]:
+    """Build the connection pools for outbound bot calls and getUpdates polling, with usage metrics"""
+    send_request = MetricsHTTPXRequest(
+        "sends",
+        connection_pool_size=Config.SEND_POOL_SIZE,
+        pool_timeout=Config.POOL_TIMEOUT,
+        http_version=Config.HTTP_VERSION,
+        httpx_kwargs={
+            "limits": httpx.Limits(
+                max_connections=Config.SEND_POOL_SIZE,
+                max_keepalive_connections=Config.KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=Config.KEEPALIVE_EXPIRY
+            )
+        }
+    )
+    # Long polling holds its connection open, so it gets a pool of its own
+    updates_request = MetricsHTTPXRequest(
+        "updates",
+        connection_pool_size=Config.UPDATES_POOL_SIZE,
+        pool_timeout=Config.POOL_TIMEOUT,
+        http_version=Config.HTTP_VERSION
+    )
+    return send_request, updates_request
@@ -0,0 +1,78 @@
+import asyncio
+import sys
+from typing import Any, Awaitable, Dict, Optional
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates concurrently, but one at a time for each chat.
+
+    Updates are handed over in the order they were received and asyncio locks
+    wake waiters first-in first-out, so a player's /send, button press and
+    message are still handled in sequence and their conversation state stays
+    consistent.
+
+    The concurrency limit is only taken once an update holds its chat's lock,
+    so updates queued behind one busy chat never hold slots other chats need.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        if max_concurrent_updates < 1:
+            raise ValueError("`max_concurrent_updates` must be a positive integer!")
+        # The base class semaphore is acquired before do_process_update, i.e. before
+        # the chat lock, so it is effectively disabled and the real limit applied in _run.
+        # The base class sizes it through max_concurrent_updates, hence the two steps.
+        self._limit = sys.maxsize
+        super().__init__(sys.maxsize)
+        self._limit = max_concurrent_updates
+        self._update_slots = asyncio.Semaphore(max_concurrent_updates)
+        self._running = 0
+        self._locks: Dict[int, asyncio.Lock] = {}
+        # Number of updates holding or waiting for each chat's lock
+        self._users: Dict[int, int] = {}
+
+    @property
+    def max_concurrent_updates(self) -> int:
+        return self._limit
+
+    @property
+    def current_concurrent_updates(self) -> int:
+        return self._running
+
+    async def _run(self, coroutine: Awaitable[Any]) -> None:
+        async with self._update_slots:
+            self._running += 1
+            try:
+                await coroutine
+            finally:
+                self._running -= 1
+
+    @staticmethod
+    def _get_key(update: object) -> Optional[int]:
+        if isinstance(update, Update) and update.effective_chat:
+            return update.effective_chat.id
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self._get_key(update)
+        if key is None:
+            await self._run(coroutine)
+            return
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            async with lock:
+                await self._run(coroutine)
+        finally:
+            self._users[key] -= 1
+            # Drop idle locks so memory stays proportional to active chats
+            if not self._users[key]:
+                del self._users[key]
+                del self._locks[key]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass